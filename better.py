@@ -83,11 +83,19 @@ class Ellement:
         'a': ascii, 's': str, 'r': repr, None: lambda x: x}
 
     def render(self) -> str:
+        # Called for every interpolation, so avoid the identity call for the
+        # common case of no format_mode, and str() for a constant format_spec.
+        # The builtin format() already parses the spec in C; caching a parsed
+        # spec per (type, spec) in Python measured about 2x slower.
         value = self.call()
-        value = self._mode_map[self.format_mode](value)
-        if self.format_spec is not None:
-            value = format(value, str(self.format_spec))
-        return f"{value}{self.suffix}"
+        if self.format_mode is not None:
+            value = self._mode_map[self.format_mode](value)
+        format_spec = self.format_spec
+        if format_spec is None:
+            return f"{value}{self.suffix}"
+        if format_spec.__class__ is not str:
+            format_spec = str(format_spec)
+        return format(value, format_spec) + self.suffix
 
     def __str__(self) -> str:
         return self.raw()
@@ -111,17 +119,22 @@ class EllString:
     The fields are supposed to be read-only and immutable.
     """
 
-    __slots__ = ("prefix", "ellements")
+    __slots__ = ("prefix", "ellements", "_raw")
 
     def __init__(self, prefix: str, *ellements: Ellement):
         self.prefix = prefix
         self.ellements = ellements
+        self._raw: Optional[str] = None
 
     def raw(self) -> str:
-        text = [self.prefix]
-        for ell in self.ellements:
-            text.append(ell.raw())
-        return "".join(text)
+        # Cached, since the fields are immutable; this makes raw() free to
+        # use as a key (e.g. for rate limiting log messages by template).
+        if self._raw is None:
+            text = [self.prefix]
+            for ell in self.ellements:
+                text.append(ell.raw())
+            self._raw = "".join(text)
+        return self._raw
 
     def render(self) -> str:
         text = [self.prefix]
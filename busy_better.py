@@ -0,0 +1,73 @@
+import timeit
+from better import Ellement, EllString
+
+
+# Measure rendering of L-strings, which calls Ellement.render for every
+# interpolation, for the kinds of values and format specs most templates use.
+# BaselineEllement keeps the previous render path for a before/after comparison.
+
+
+class BaselineEllement(Ellement):
+    __slots__ = ()
+
+    def render(self):
+        value = self.call()
+        value = self._mode_map[self.format_mode](value)
+        if self.format_spec is not None:
+            value = format(value, str(self.format_spec))
+        return f"{value}{self.suffix}"
+
+
+x = 3.14159
+n = 42
+ham = "<HAM>"
+width = 10
+
+
+def make_ell_strings(ellement):
+    # l"x={x:.3f} n={n:03d} ham={ham:_<10s} n={n} ham={ham!r}"
+    ell = EllString("x=",
+                    ellement("x", lambda: x, None, ".3f", " n="),
+                    ellement("n", lambda: n, None, "03d", " ham="),
+                    ellement("ham", lambda: ham, None, "_<10s", " n="),
+                    ellement("n", lambda: n, None, None, " ham="),
+                    ellement("ham!r", lambda: ham, "r", None, ""))
+    # l"{ham:_<{width}s}", with a nested format spec
+    nested = EllString("",
+                       ellement("ham", lambda: ham, None,
+                                EllString("_<", ellement("width", lambda: width, None, None, "s")),
+                                ""))
+    return ell, nested
+
+
+ell, nested = make_ell_strings(Ellement)
+baseline_ell, baseline_nested = make_ell_strings(BaselineEllement)
+
+
+def busy_f_string(count):
+    for i in range(count):
+        f"x={x:.3f} n={n:03d} ham={ham:_<10s} n={n} ham={ham!r}"
+
+
+def busy_render(ell_string, count):
+    for i in range(count):
+        ell_string.render()
+
+
+def time_code(name, stmt):
+    # Best of several runs, since the differences are small
+    print(name,
+          min(timeit.repeat(
+              stmt,
+              globals=globals(),
+              repeat=7,
+              number=1000)))
+
+
+if __name__ == '__main__':
+    time_code("f-string", "busy_f_string(100)")
+    time_code("L-string (baseline render)", "busy_render(baseline_ell, 100)")
+    time_code("L-string", "busy_render(ell, 100)")
+    time_code("L-string with nested format spec (baseline render)",
+              "busy_render(baseline_nested, 100)")
+    time_code("L-string with nested format spec", "busy_render(nested, 100)")
@@ -0,0 +1,49 @@
+import timeit
+from translation import FL, compile_message, plural_rules
+
+
+# Compare the cost of rendering compiled catalog messages. A flat message is
+# just str.format_map; a plural message adds picking a branch with the
+# precompiled plural rule for the locale, which should cost little more.
+
+flat = "{person} nodigt {num_guests} gasten uit op hun feest"
+plural = ("{person} nodigt {num_guests, plural, =0 {niemand} one {# gast} "
+          "other {# gasten}} uit op hun feest")
+
+
+def busy_str_format(n):
+    for i in range(n):
+        flat.format(person="Guido", num_guests=i)
+
+
+def busy_compiled_flat(n):
+    render = compile_message("nl", flat)
+    for i in range(n):
+        render({"person": "Guido", "num_guests": i})
+
+
+def busy_compiled_plural(n):
+    render = compile_message("nl", plural)
+    for i in range(n):
+        render({"person": "Guido", "num_guests": i})
+
+
+def busy_plural_rule(n):
+    rule = plural_rules["pl"]
+    for i in range(n):
+        rule(i)
+
+
+def time_code(name, stmt):
+    print(name,
+          timeit.timeit(
+              stmt,
+              globals=globals(),
+              number=1000))
+
+
+if __name__ == '__main__':
+    time_code("str.format", "busy_str_format(100)")
+    time_code("Compiled flat message", "busy_compiled_flat(100)")
+    time_code("Compiled plural message", "busy_compiled_plural(100)")
+    time_code("Plural rule (pl) alone", "busy_plural_rule(100)")
@@ -0,0 +1,322 @@
+# mypy: disallow-untyped-defs
+
+"""Extract translatable templates into a catalog template (.pot file).
+
+Finds, without importing anything:
+
+- TS("...", ...) and TeeString(...) constructor calls; for TeeString, the raw
+  string is reconstructed from the constant parts of its Ellement arguments,
+  as EllString.raw() would at runtime.
+
+- Calls to the `_` marker, as in _("...") or _(fl("...")), where the raw
+  string is the first constant argument.
+
+- t"..." literals, when the running Python supports them (ast.TemplateStr).
+
+Modules are parsed with ast across a process pool. A cache of the content
+hash (plus stat) of each file, and of the templates found in it, means that
+re-runs only reparse the files that changed:
+
+    python extract.py -o messages.pot src/
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+__all__ = ["extract_messages", "extract_files", "write_pot"]
+
+CACHE_VERSION = 1
+
+# Constructor names whose first argument is the raw string
+RAW_CONSTRUCTORS = {"TS"}
+# Marker functions, which serve only to flag their argument as translatable
+MARKERS = {"_"}
+# Lazy-string constructors recognized as the argument of a marker, as in
+# _(fl("...")); other calls, such as _(gettext("...")), are not templates
+LAZY_CONSTRUCTORS = {"fl", "FL"}
+
+Message = Tuple[str, int]  # (raw, lineno)
+
+
+def _callee_name(node: ast.Call) -> Optional[str]:
+    # Matches both TS(...) and translation.TS(...)
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _constant_str(node: Optional[ast.expr]) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _ell_string_raw(node: ast.Call) -> Optional[str]:
+    """Reconstructs EllString.raw() (or TeeString) from a constructor call."""
+    if not node.args or node.keywords:
+        return None
+    prefix = _constant_str(node.args[0])
+    if prefix is None:
+        return None
+    text = [prefix]
+    for arg in node.args[1:]:
+        if not (isinstance(arg, ast.Call) and _callee_name(arg) == "Ellement"
+                and len(arg.args) == 5):
+            return None
+        expr_node, _, _, spec_node, suffix_node = arg.args
+        expr = _constant_str(expr_node)
+        suffix = _constant_str(suffix_node)
+        if expr is None or suffix is None:
+            return None
+        text.append("{")
+        text.append(expr)
+        if isinstance(spec_node, ast.Call):
+            if _callee_name(spec_node) not in ("EllString", "TeeString"):
+                return None
+            spec = _ell_string_raw(spec_node)
+            if spec is None:
+                return None
+        elif isinstance(spec_node, ast.Constant) and spec_node.value is None:
+            spec = None
+        else:
+            spec = _constant_str(spec_node)
+            if spec is None:
+                return None
+        if spec is not None:
+            text.append(":")
+            text.append(spec)
+        text.append("}")
+        text.append(suffix)
+    return "".join(text)
+
+
+def _template_str_raw(values: Iterable[ast.expr]) -> str:
+    # ast.TemplateStr (t"...") and its format specs; Python 3.14+
+    text: List[str] = []
+    for value in values:
+        if isinstance(value, ast.Constant):
+            if isinstance(value.value, str):
+                text.append(value.value.replace("{", "{{").replace("}", "}}"))
+            continue
+        expr = getattr(value, "str", None) or ast.unparse(value.value)  # type: ignore[attr-defined]
+        text.append("{" + expr)
+        if value.conversion != -1:  # type: ignore[attr-defined]
+            text.append("!" + chr(value.conversion))  # type: ignore[attr-defined]
+        if value.format_spec is not None:  # type: ignore[attr-defined]
+            text.append(":" + _template_str_raw(value.format_spec.values))  # type: ignore[attr-defined]
+        text.append("}")
+    return "".join(text)
+
+
+_TemplateStr = getattr(ast, "TemplateStr", None)
+
+
+def extract_messages(source: bytes, filename: str = "<unknown>") -> List[Message]:
+    """Returns the translatable templates in `source`, ordered by line."""
+    tree = ast.parse(source, filename)
+    messages = []
+    for node in ast.walk(tree):
+        raw = None
+        if isinstance(node, ast.Call):
+            name = _callee_name(node)
+            if name in RAW_CONSTRUCTORS and node.args:
+                raw = _constant_str(node.args[0])
+            elif name == "TeeString":
+                raw = _ell_string_raw(node)
+            elif name in MARKERS and len(node.args) == 1:
+                arg = node.args[0]
+                raw = _constant_str(arg)
+                # TS and TeeString are found by the walk itself
+                if (isinstance(arg, ast.Call) and arg.args
+                        and _callee_name(arg) in LAZY_CONSTRUCTORS):
+                    raw = _constant_str(arg.args[0])
+        elif _TemplateStr is not None and isinstance(node, _TemplateStr):
+            raw = _template_str_raw(node.values)  # type: ignore[attr-defined]
+        if raw is not None:
+            messages.append((raw, node.lineno))  # type: ignore[attr-defined]
+    messages.sort(key=lambda message: message[1])
+    return messages
+
+
+def _parse_file(path: str) -> Tuple[str, Optional[List[Message]]]:
+    # Runs in a worker process. None means the file could not be read (and
+    # so is left out of the cache); unparsable files have no messages.
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+    except OSError as err:
+        print(f"{path}: skipped: {err}", file=sys.stderr)
+        return path, None
+    try:
+        return path, extract_messages(source, path)
+    except (SyntaxError, ValueError) as err:
+        print(f"{path}: skipped: {err}", file=sys.stderr)
+        return path, []
+
+
+def iter_python_files(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(
+                d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    yield os.path.join(dirpath, filename)
+
+
+def _valid_entry(entry: object) -> bool:
+    return (isinstance(entry, dict) and isinstance(entry.get("stat"), list)
+            and isinstance(entry.get("sha1"), str)
+            and isinstance(entry.get("messages"), list))
+
+
+def load_cache(cache_path: Optional[str]) -> Dict[str, dict]:
+    # A missing, unreadable or malformed cache is treated as empty, as are
+    # malformed entries
+    if cache_path is None or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    files = cache.get("files")
+    if not isinstance(files, dict):
+        return {}
+    return {path: entry for path, entry in files.items() if _valid_entry(entry)}
+
+
+def _in_scan(path: str, paths: List[str]) -> bool:
+    return any(path == root or path.startswith(os.path.join(root, ""))
+               for root in paths)
+
+
+def save_cache(cache_path: str, files: Dict[str, dict]) -> None:
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def extract_files(paths: Iterable[str],
+                  cache_path: Optional[str] = None,
+                  jobs: Optional[int] = None) -> Dict[str, List[Message]]:
+    """Returns the templates found in each Python file under `paths`.
+
+    Files whose size and mtime are unchanged since the cached run are not
+    read; otherwise a file is only reparsed if its content hash changed.
+    Cached entries for files outside of `paths` are kept, so that runs over
+    different parts of a tree can share one cache.
+    """
+    paths = list(paths)
+    cached = load_cache(cache_path)
+    files: Dict[str, dict] = {}
+    stale: List[str] = []
+    dirty = False  # whether the cache needs saving, besides stale files
+    for path in iter_python_files(paths):
+        # Files may go away while we run
+        try:
+            st = os.stat(path)
+            entry = cached.get(path)
+            if entry is not None and entry["stat"] == [st.st_mtime_ns, st.st_size]:
+                files[path] = entry
+                continue
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except OSError as err:
+            print(f"{path}: skipped: {err}", file=sys.stderr)
+            continue
+        if entry is not None and entry["sha1"] == digest:
+            # Save the new stat, so that the next run can skip hashing
+            entry["stat"] = [st.st_mtime_ns, st.st_size]
+            files[path] = entry
+            dirty = True
+            continue
+        files[path] = {"stat": [st.st_mtime_ns, st.st_size], "sha1": digest}
+        stale.append(path)
+
+    # Starting a pool is only worth it for more than a few files
+    if len(stale) > 4 and jobs != 1:
+        workers = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(stale) // (4 * workers))
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_parse_file, stale, chunksize=chunksize))
+    else:
+        results = [_parse_file(path) for path in stale]
+    for path, messages in results:
+        if messages is None:
+            del files[path]
+        else:
+            files[path]["messages"] = messages
+
+    if cache_path is not None:
+        others = {path: entry for path, entry in cached.items()
+                  if path not in files and not _in_scan(path, paths)}
+        if dirty or stale or files.keys() | others.keys() != cached.keys():
+            save_cache(cache_path, {**others, **files})
+    return {path: [tuple(m) for m in entry["messages"]]  # type: ignore[misc]
+            for path, entry in files.items()}
+
+
+def _po_quote(s: str) -> str:
+    s = s.replace("\\", "\\\\").replace('"', '\\"').replace("\t", "\\t")
+    if "\n" not in s:
+        return f'"{s}"'
+    lines = s.split("\n")
+    quoted = [f'"{line}\\n"' for line in lines[:-1]]
+    if lines[-1]:
+        quoted.append(f'"{lines[-1]}"')
+    return '""\n' + "\n".join(quoted)
+
+
+def write_pot(extracted: Dict[str, List[Message]], out: TextIO) -> None:
+    references: Dict[str, List[str]] = {}
+    for path, messages in extracted.items():
+        for raw, lineno in messages:
+            references.setdefault(raw, []).append(f"{path}:{lineno}")
+    out.write('msgid ""\nmsgstr ""\n'
+              '"Content-Type: text/plain; charset=UTF-8\\n"\n')
+    for raw, refs in references.items():
+        out.write(f"\n#: {' '.join(refs)}\n"
+                  f"#, python-brace-format\n"
+                  f"msgid {_po_quote(raw)}\n"
+                  f'msgstr ""\n')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Python files or directories")
+    parser.add_argument("-o", "--output", help="catalog template (default: stdout)")
+    parser.add_argument("--cache", default=".extract-cache.json",
+                        help="per-file cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    extracted = extract_files(
+        args.paths, None if args.no_cache else args.cache, args.jobs)
+    if args.output is None:
+        write_pot(extracted, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            write_pot(extracted, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ def test_basic():
                     Ellement("spam", lambda: spam, None, None, " Ham "),
                     Ellement("ham", lambda: ham, None, "_<10s", " Eggs"))
     assert ell.raw() == "Spam {spam} Ham {ham:_<10s} Eggs"
+    assert ell.raw() is ell.raw()  # cached
     assert ell.render() == "Spam <SPAM> Ham <HAM>_____ Eggs"
 
 
@@ -31,3 +32,21 @@ def test_ellement_with_ell_string():
     assert ellem.render() == "42___."
     assert str(ellem) == "{eggs:{fill}{align}{width}d}."
     assert repr(ellem) == "Ellement('eggs', <lambda>, None, l'{fill}{align}{width}d', '.')"
+
+
+def test_render_matches_format():
+    values = [0, -42, True, 3.14159, -0.0, float("nan"), "spam", "ünï", None, (1, 2)]
+    specs = [None, "", ".3f", "03d", "_<10s", ">8", "x", "+08.2e", "^7"]
+    for value in values:
+        for mode, convert in [(None, lambda v: v), ("r", repr), ("s", str), ("a", ascii)]:
+            for spec in specs:
+                ellem = Ellement("value", lambda: value, mode, spec, "!")
+                try:
+                    expected = format(convert(value), spec or "") + "!"
+                except (TypeError, ValueError) as err:
+                    expected = type(err)
+                try:
+                    actual = ellem.render()
+                except (TypeError, ValueError) as err:
+                    actual = type(err)
+                assert actual == expected, (value, mode, spec)
@@ -0,0 +1,133 @@
+import io
+import json
+import os
+
+import pytest
+
+from extract import extract_files, extract_messages, write_pot
+
+
+SOURCE = b'''
+s = TS("{person} invites {num_guests} guests", lambda cb: "")
+ell = TeeString("Spam ",
+                Ellement("spam", lambda: spam, None, None, " Ham "),
+                Ellement("ham", lambda: ham, None, "_<10s", " Eggs"))
+print(_(fl("{host} invites {guest}")))
+print(_("Plain"), _(translation.TS("Qualified", lambda cb: "")))
+not_extracted = TS(message, lambda cb: "")
+'''
+
+
+def test_extract_messages():
+    assert extract_messages(SOURCE) == [
+        ("{person} invites {num_guests} guests", 2),
+        ("Spam {spam} Ham {ham:_<10s} Eggs", 3),
+        ("{host} invites {guest}", 6),
+        ("Plain", 7),
+        ("Qualified", 7),
+    ]
+
+
+def test_extract_marked_constructors():
+    source = b'''
+_(TeeString("Spam ", Ellement("spam", lambda: spam, None, None, " Ham")))
+_(TS("Translated", lambda cb: ""))
+_(FL("Lazy", lambda cb: ""))
+_(str("not a template"))
+_(gettext("x"))
+'''
+    assert extract_messages(source) == [
+        ("Spam {spam} Ham", 2),
+        ("Translated", 3),
+        ("Lazy", 4),
+    ]
+
+
+def test_extract_nested_spec():
+    source = b'''
+TeeString("a", Ellement("b", lambda: b, None,
+                        EllString("", Ellement("w", lambda: w, None, None, "d")), "."))
+TeeString("a", Ellement("b", lambda: b, None,
+                        EllString("", Ellement("w", lambda: w, None, None, foo)), "."))
+TeeString("a", Ellement("b", lambda: b, None, make_spec(), "."))
+'''
+    assert extract_messages(source) == [("a{b:{w}d}.", 2)]
+
+
+def test_extract_files_cache(tmp_path):
+    module = tmp_path / "mod.py"
+    module.write_bytes(SOURCE)
+    cache = str(tmp_path / "cache.json")
+    first = extract_files([str(tmp_path)], cache)
+    assert first[str(module)][0] == ("{person} invites {num_guests} guests", 2)
+
+    # Same content, new mtime: served from the cache by content hash
+    os.utime(module, ns=(0, 0))
+    assert extract_files([str(tmp_path)], cache) == first
+    # ...and the new stat is saved, so the next run need not hash it
+    with open(cache) as f:
+        assert json.load(f)["files"][str(module)]["stat"][0] == 0
+
+    module.write_bytes(b'_("Changed")\n')
+    assert extract_files([str(tmp_path)], cache) == {str(module): [("Changed", 1)]}
+
+
+def test_extract_files_pool(tmp_path, capfd):
+    for i in range(6):
+        (tmp_path / f"mod{i}.py").write_text(f'_("Message {i}")\n')
+    (tmp_path / "broken.py").write_text("_(\n")
+    cache = str(tmp_path / "cache.json")
+    extracted = extract_files([str(tmp_path)], cache, jobs=2)
+    assert extracted[str(tmp_path / "broken.py")] == []
+    assert "broken.py: skipped" in capfd.readouterr().err
+    for i in range(6):
+        assert extracted[str(tmp_path / f"mod{i}.py")] == [(f"Message {i}", 1)]
+    assert extract_files([str(tmp_path)], cache) == extracted
+
+
+def test_extract_files_missing(tmp_path, capsys):
+    missing = str(tmp_path / "missing.py")
+    assert extract_files([missing]) == {}
+    assert "missing.py: skipped" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("content", [
+    "[]", "{}", '{"version": 1}', '{"version": 1, "files": []}',
+    '{"version": 1, "files": {"a.py": null}}', '{"version": 1, "files": {"a.py": {}}}',
+    "not json",
+])
+def test_extract_files_malformed_cache(tmp_path, content):
+    module = tmp_path / "a.py"
+    module.write_text('_("A")\n')
+    cache = tmp_path / "cache.json"
+    cache.write_text(content.replace("a.py", str(module)))
+    assert extract_files([str(module)], str(cache)) == {str(module): [("A", 1)]}
+
+
+def test_extract_files_shared_cache(tmp_path):
+    for name in ("one", "two"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "mod.py").write_text(f'_("{name}")\n')
+    cache = str(tmp_path / "cache.json")
+    one, two = str(tmp_path / "one"), str(tmp_path / "two")
+    extract_files([one], cache)
+    extract_files([two], cache)
+    with open(cache) as f:
+        assert sorted(json.load(f)["files"]) == [
+            os.path.join(one, "mod.py"), os.path.join(two, "mod.py")]
+
+    # But a file removed from a scanned directory is dropped
+    os.remove(os.path.join(one, "mod.py"))
+    assert extract_files([one], cache) == {}
+    with open(cache) as f:
+        assert list(json.load(f)["files"]) == [os.path.join(two, "mod.py")]
+
+
+def test_write_pot():
+    out = io.StringIO()
+    write_pot({"a.py": [('Say "hi"\n', 1)], "b.py": [('Say "hi"\n', 3)]}, out)
+    assert out.getvalue().endswith(
+        '\n#: a.py:1 b.py:3\n'
+        '#, python-brace-format\n'
+        'msgid ""\n"Say \\"hi\\"\\n"\n'
+        'msgstr ""\n')
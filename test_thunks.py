@@ -0,0 +1,115 @@
+import logging
+
+import pytest
+
+from thunks import RateLimitedLogLiteral, Thunk
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def setup(caplog):
+    clock = Clock()
+    summary_log = logging.getLogger("test_thunks.summary")
+    log = logging.getLogger("test_thunks.flood")
+    caplog.set_level(logging.DEBUG)
+
+    def make(**kwargs):
+        rl = RateLimitedLogLiteral(logger=summary_log, clock=clock, **kwargs)
+        log.filters = [rl]
+        return rl
+
+    yield clock, log, make, caplog
+    log.filters = []
+
+
+def log_thunks(log, rl, count, raw="Flood entry: {i}"):
+    for _ in range(count):
+        log.debug(rl(Thunk(rl, raw, lambda: "rendered")))
+
+
+def flood_messages(caplog):
+    return [r for r in caplog.records if r.name == "test_thunks.flood"]
+
+
+def summaries(caplog):
+    return [r.getMessage() for r in caplog.records if r.name == "test_thunks.summary"]
+
+
+def test_dropped_thunks_are_not_rendered(setup):
+    clock, log, make, caplog = setup
+    rl = make(rate=1.0, burst=3, sample_every=10)
+    rendered = set()
+
+    def function(i):
+        def render():
+            rendered.add(i)
+            return f"Flood entry: {i}"
+        return render
+
+    for i in range(1000):
+        log.debug(rl(Thunk(rl, "Flood entry: {i}", function(i))))
+    assert len(flood_messages(caplog)) == 3
+    assert rendered == {0, 10, 20}
+
+
+def test_sampling(setup):
+    clock, log, make, caplog = setup
+    rl = make(rate=1.0, burst=1000, sample_every=4)
+    log_thunks(log, rl, 10)
+    assert len(flood_messages(caplog)) == 3  # 1st, 5th and 9th
+
+
+def test_refill(setup):
+    clock, log, make, caplog = setup
+    rl = make(rate=2.0, burst=2)
+    log_thunks(log, rl, 5)
+    assert len(flood_messages(caplog)) == 2
+    clock.now = 1.0  # refills 2 tokens
+    log_thunks(log, rl, 5)
+    assert len(flood_messages(caplog)) == 4
+    clock.now = 100.0  # but never more than burst
+    log_thunks(log, rl, 5)
+    assert len(flood_messages(caplog)) == 6
+
+
+def test_templates_are_limited_separately(setup):
+    clock, log, make, caplog = setup
+    rl = make(rate=1.0, burst=1)
+    log_thunks(log, rl, 5, "a {i}")
+    log_thunks(log, rl, 5, "b {i}")
+    assert len(flood_messages(caplog)) == 2
+
+
+def test_summary_interval(setup):
+    clock, log, make, caplog = setup
+    rl = make(rate=1.0, burst=1, summary_interval=10.0)
+    log_thunks(log, rl, 5)
+    assert summaries(caplog) == []
+    clock.now = 10.0
+    log_thunks(log, rl, 1)  # allowed after refill, and triggers the summary
+    assert summaries(caplog) == ["Suppressed 4 occurrences of 'Flood entry: {i}'"]
+    clock.now = 15.0
+    log_thunks(log, rl, 3)  # 1 allowed, not yet due
+    assert len(summaries(caplog)) == 1
+    rl.flush()
+    assert summaries(caplog)[1:] == ["Suppressed 2 occurrences of 'Flood entry: {i}'"]
+    rl.flush()  # counts were reset
+    assert len(summaries(caplog)) == 2
+
+
+def test_idle_buckets_are_dropped(setup):
+    clock, log, make, caplog = setup
+    rl = make(rate=1.0, burst=5, summary_interval=10.0)
+    for i in range(100):
+        log.debug(f"Already formatted {i}")
+    assert len(rl.buckets) == 100
+    clock.now = 10.0
+    log.debug("Already formatted 100")
+    assert list(rl.buckets) == ["Already formatted 100"]
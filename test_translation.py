@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+import pytest
+
+from translation import compile_message, plural_operands, plural_rules
+
+
+def test_plural_rules():
+    pl = plural_rules["pl"]
+    assert [pl(n) for n in (0, 1, 2, 5, 12, 22, 1.5)] == [
+        "many", "one", "few", "many", "many", "few", "other"]
+    assert plural_rules["en"](1) == "one"
+    assert plural_rules["en"](1.0) == "other"  # "1.0 guests"
+    assert plural_rules["fr"](0) == "one"
+    # Exponent notation and other edge cases of the operands
+    assert plural_operands(1e-07) == (Decimal("1E-7"), 0, 7, 1, 1)
+    assert plural_operands(1e22)[1:] == (10**22, 0, 0, 0)
+    assert pl(1e22) == "many"
+    assert plural_operands(True) == (1, 1, 0, 0, 0)
+    assert plural_rules["en"](True) == "one"
+    assert plural_operands(Decimal("-2.50")) == (Decimal("2.50"), 2, 2, 50, 5)
+    for value in (float("inf"), float("-inf"), float("nan"), Decimal("nan")):
+        assert plural_operands(value) is None
+        assert pl(value) == "other"
+    render = compile_message("en", "{n, plural, one {# item} other {# items}}")
+    assert render({"n": float("inf")}) == "inf items"
+
+
+def test_compile_plural_message():
+    render = compile_message(
+        "en", "{{{n, plural, =0 {none} one {# item} other {# items}}}} at {price:.2f}")
+    assert render({"n": 0, "price": 1}) == "{none} at 1.00"
+    assert render({"n": 1, "price": 1}) == "{1 item} at 1.00"
+    assert render({"n": 7, "price": 1}) == "{7 items} at 1.00"
+    assert compile_message(
+        "en", "{{{n, plural, =0 {none} one {# item} other {# items}}}} at {price:.2f}") is render
+
+
+def test_compile_nested_select():
+    render = compile_message(
+        "en",
+        "{g, select, female {{n, plural, one {her guest} other {her # guests}}} "
+        "other {{n, plural, one {their guest} other {their # guests}}}}")
+    assert render({"g": "female", "n": 1}) == "her guest"
+    assert render({"g": "x", "n": 3}) == "their 3 guests"
+
+
+def test_flat_message_is_format_map():
+    render = compile_message("en", "{a} and {b:>3}")
+    assert render({"a": 1, "b": 2}) == "1 and   2"
+
+
+@pytest.mark.parametrize("message", [
+    "{n, plural, one {# item}}",
+    "{n, plural, other {# items}",
+    "{n",
+    "n}",
+    "{n, plural, =x {none} other {some}}",
+    "{n, plural, =nan {none} other {some}}",
+    "{n, plural, =inf {none} other {some}}",
+    "{n, plural, =1e400 {none} other {some}}",
+])
+def test_malformed_message(message):
+    with pytest.raises(ValueError):
+        compile_message("en", message)
+
+
+def test_render_does_not_modify_table():
+    render = compile_message(
+        "en", "{n, plural, =0 {none} other {# of {m, select, a {A} other {?}}}}")
+    table = {"n": 3, "m": "a"}
+    assert render(table) == "3 of A"
+    assert table == {"n": 3, "m": "a"}
+
+
+def test_sequential_choices():
+    render = compile_message(
+        "pl", "{a, plural, one {# plik} few {# pliki} other {# plików}}"
+              " i {b, plural, =0 {nic} one {# folder} other {# folderów}}")
+    assert render({"a": 1, "b": 0}) == "1 plik i nic"
+    assert render({"a": 3, "b": 1}) == "3 pliki i 1 folder"
+    assert render({"a": 5, "b": 2.0}) == "5 plików i 2.0 folderów"
+
+
+def test_many_choices_compile_linearly():
+    import time
+    from translation import MessageCompiler
+
+    choice = "{{n{0}, plural, =0 {{none}} one {{# one}} other {{# many}}}}"
+    message = " ".join(choice.format(k) for k in range(12))
+    compiler = MessageCompiler("en")
+    start = time.perf_counter()
+    render = compiler.compile(message)
+    assert time.perf_counter() - start < 0.5
+    assert len(compiler.lines) < 12 * 12
+    table = {f"n{k}": k for k in range(12)}
+    assert render(table) == "none 1 one " + " ".join(f"{k} many" for k in range(2, 12))
+
+
+def test_generated_literals_and_fields():
+    render = compile_message(
+        "en",
+        'a"b\'c\\d\n{{x}} {n, plural, one {# {obj.real} {s!r:>6} {d[k]}} '
+        'other {{s:{w}}|{s:"^5}}}')
+    table = {"n": 1, "obj": 7, "s": "hi", "d": {"k": "v"}, "w": 4}
+    assert render(table) == "a\"b'c\\d\n{x} 1 7   'hi' v"
+    table["n"] = 2
+    assert render(table) == "a\"b'c\\d\n{x} hi  |\"hi\"\""
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import logging
 import shlex
+import threading
+import time
 from string import Formatter
 from typing import *
 
@@ -127,7 +129,8 @@ def print_dir(path: str) -> None:
     print(sh(Thunk(sh, r"ls -l {path}", lambda: f"ls -l {path}")))
 
 
-print_dir(path="/Users/Jim Baker - Admin/App Code & More/*.py")
+if __name__ == "__main__":
+    print_dir(path="/Users/Jim Baker - Admin/App Code & More/*.py")
 
 
 # Alternative, showing the use of the original default
@@ -140,6 +143,149 @@ class log_literal(Tag):
 
 l = log_literal()
 
-logging.basicConfig(level=logging.DEBUG)
-i = 47
-logging.debug(l(Thunk(l, r"Log entry: {i:03d}", lambda: f"Log entry: {i:03d}")))
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    i = 47
+    logging.debug(l(Thunk(l, r"Log entry: {i:03d}", lambda: f"Log entry: {i:03d}")))
+
+
+# Rate limiting and sampling of log messages, keyed by the raw template. Because
+# the raw template is carried alongside the deferred function, the decision to
+# drop a message can be made without ever rendering it - so CPU spent on
+# formatting stays flat during a flood, no matter how many messages are logged.
+
+def template_key(record: logging.LogRecord) -> str:
+    """Returns the raw template of the record's message, without rendering it.
+
+    Works with Thunk.raw, FLCallable.raw, FL.raw (all attributes) and
+    EllString.raw() (a method). Plain str messages are already their own
+    template; anything else is keyed by its callsite.
+    """
+    msg = record.msg
+    if isinstance(msg, str):
+        return msg
+    raw = getattr(msg, "raw", None)
+    if callable(raw):
+        raw = raw()
+    if isinstance(raw, str):
+        return raw
+    return f"{record.pathname}:{record.lineno}"
+
+
+class TemplateBucket:
+    __slots__ = ("tokens", "updated", "seen", "suppressed")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.seen = 0
+        self.suppressed = 0
+
+
+class RateLimitedLogLiteral(Tag):
+    """Log tag that is also a logging filter, so it can be used like so:
+
+        l = RateLimitedLogLiteral(rate=5.0, burst=10, sample_every=100)
+        log.addFilter(l)
+        log.debug(l(Thunk(l, r"Log entry: {i}", lambda: f"Log entry: {i}")))
+
+    Per raw template, 1 in `sample_every` messages is kept, and kept messages
+    are further limited by a token bucket refilling at `rate` tokens/second up
+    to `burst`. The number of suppressed occurrences of each template is
+    logged to `logger` on flush(), and by the first record through the filter
+    once `summary_interval` seconds have passed since the last summary. There
+    is no timer, so summaries ride on later log traffic: call flush() (say, at
+    shutdown or from a periodic task) to report the tail end of a flood.
+    """
+
+    summary_template = "Suppressed %d occurrences of %r"
+
+    def __init__(self,
+                 rate: float = 10.0,
+                 burst: int = 10,
+                 sample_every: int = 1,
+                 summary_interval: float = 60.0,
+                 logger: Optional[logging.Logger] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or burst < 1 or sample_every < 1:
+            raise ValueError(
+                f"Invalid limits: {rate=}, {burst=}, {sample_every=}")
+        self.rate = rate
+        self.burst = burst
+        self.sample_every = sample_every
+        self.summary_interval = summary_interval
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.clock = clock
+        self.buckets: Dict[str, TemplateBucket] = {}
+        self.next_summary = clock() + summary_interval
+        # Unlike Thunk.set_target, racing here would lose counts, so lock
+        self.lock = threading.Lock()
+
+    def __call__(self, thunk: Thunk) -> Thunk:
+        return thunk
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.msg is self.summary_template:
+            return True
+        key = template_key(record)
+        now = self.clock()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TemplateBucket(self.burst, now)
+            allowed = bucket.seen % self.sample_every == 0
+            bucket.seen += 1
+            if allowed:
+                bucket.tokens = min(
+                    self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                else:
+                    allowed = False
+            if not allowed:
+                bucket.suppressed += 1
+            summaries = []
+            if now >= self.next_summary:
+                summaries = self.take_summaries(now)
+                self.next_summary = now + self.summary_interval
+        self.log_summaries(summaries)
+        return allowed
+
+    def take_summaries(self, now: float) -> List[Tuple[str, int]]:
+        # Caller must hold self.lock. Also drops the buckets with nothing to
+        # report that have refilled, since a fresh bucket behaves the same;
+        # otherwise a flood of already formatted str messages, each its own
+        # template, would grow self.buckets without bound.
+        summaries = []
+        idle = []
+        for key, bucket in self.buckets.items():
+            if bucket.suppressed:
+                summaries.append((key, bucket.suppressed))
+                bucket.suppressed = 0
+            elif bucket.tokens + (now - bucket.updated) * self.rate >= self.burst:
+                idle.append(key)
+        for key in idle:
+            del self.buckets[key]
+        return summaries
+
+    def log_summaries(self, summaries: List[Tuple[str, int]]) -> None:
+        for key, count in summaries:
+            self.logger.warning(self.summary_template, count, key)
+
+    def flush(self) -> None:
+        now = self.clock()
+        with self.lock:
+            summaries = self.take_summaries(now)
+            self.next_summary = now + self.summary_interval
+        self.log_summaries(summaries)
+
+
+if __name__ == "__main__":
+    rl = RateLimitedLogLiteral(rate=1.0, burst=3, sample_every=10)
+    flood_log = logging.getLogger("flood")
+    flood_log.addFilter(rl)
+    for i in range(1000):
+        # Only 3 of these thunks are ever rendered
+        flood_log.debug(rl(Thunk(rl, r"Flood entry: {i:03d}", lambda: f"Flood entry: {i:03d}")))
+    rl.flush()
@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import functools
+import math
+import re
+import string
 from contextvars import ContextVar
-from typing import Callable, Dict, List, Optional
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
 # Called for each interpolation.
 #
@@ -90,11 +95,379 @@ translator_cv: ContextVar[Optional[TranslatorFunctionType]] = \
   ContextVar("translation.callback", default=None)
 
 
+# Message format
+#
+# Catalog entries use str.format syntax, extended with ICU-style plural and
+# select arguments over the interpolated values:
+#
+#   {num_guests, plural, =0 {nobody} one {# guest} other {# guests}}
+#   {gender, select, female {her} male {his} other {their}}
+#
+# In a plural branch, "#" stands for the value of the plural argument. Branches
+# end at the first unmatched "}", so "}}" is only an escape outside of them.
+#
+# Each (locale, message) is compiled once into a render function taking the
+# table of interpolated values. A message without plural/select is rendered by
+# str.format_map alone; see MessageCompiler for the others.
+
+RenderType = Callable[[Dict[str, object]], str]
+PluralRuleType = Callable[[object], str]
+
+
+# CLDR plural rules (http://cldr.unicode.org/index/cldr-spec/plural-rules),
+# with the categories in CLDR order; "other" is implied. Only the integer and
+# visible-fraction operands (n, i, v, f, t) are supported.
+plural_rule_sources: Dict[str, Dict[str, str]] = {
+    "en": {"one": "i = 1 and v = 0"},
+    "nl": {"one": "i = 1 and v = 0"},
+    "de": {"one": "i = 1 and v = 0"},
+    "fr": {"one": "i = 0,1"},
+    "pl": {
+        "one": "i = 1 and v = 0",
+        "few": "v = 0 and i % 10 = 2..4 and i % 100 != 12..14",
+        "many": "v = 0 and i != 1 and i % 10 = 0..1 or "
+                "v = 0 and i % 10 = 5..9 or "
+                "v = 0 and i % 100 = 12..14",
+    },
+    "ja": {},
+}
+
+
+Number = Union[int, float, Decimal]
+
+
+def plural_operands(value: Number) -> Optional[Tuple[Number, int, int, int, int]]:
+    # Returns None for infinities and NaN, which have no operands
+    if isinstance(value, int):  # including bool
+        i = abs(int(value))
+        return i, i, 0, 0, 0
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        # The shortest repr has exactly the visible digits, also for 1e-07
+        value = Decimal(repr(value))
+    if not value.is_finite():
+        return None
+    n = abs(value)
+    integer, _, fraction = format(n, "f").partition(".")
+    return (n, int(integer), len(fraction),
+            int(fraction or 0), int(fraction.rstrip("0") or 0))
+
+
+_cldr_relation = re.compile(
+    r"\s*([nivft])\s*(?:%\s*(\d+))?\s*(!=|=)\s*(\d+(?:\.\.\d+)?(?:\s*,\s*\d+(?:\.\.\d+)?)*)\s*")
+
+
+def _compile_cldr_condition(condition: str) -> str:
+    or_parts = []
+    for and_condition in condition.split(" or "):
+        and_parts = []
+        for relation in and_condition.split(" and "):
+            m = _cldr_relation.fullmatch(relation)
+            if m is None:
+                raise ValueError(f"Unsupported plural rule: {relation!r}")
+            operand, modulus, op, range_list = m.groups()
+            values: Set[int] = set()
+            for item in range_list.split(","):
+                low, _, high = item.strip().partition("..")
+                values.update(range(int(low), int(high or low) + 1))
+            if modulus:
+                operand = f"{operand} % {modulus}"
+            # Constant set displays compile to frozenset constants
+            in_op = "not in" if op == "!=" else "in"
+            and_parts.append(f"{operand} {in_op} {{{', '.join(map(str, sorted(values)))}}}")
+        or_parts.append(" and ".join(and_parts))
+    return " or ".join(f"({part})" for part in or_parts)
+
+
+def compile_plural_rule(lang: str, rules: Dict[str, str]) -> PluralRuleType:
+    expr = "".join(
+        f"{category!r} if {_compile_cldr_condition(condition)} else "
+        for category, condition in rules.items())
+    source = f"""
+def plural_{lang}(value):
+    if value.__class__ is int:
+        n = i = abs(value)
+        v = f = t = 0
+    else:
+        operands = plural_operands(value)
+        if operands is None:
+            return 'other'
+        n, i, v, f, t = operands
+    return {expr}'other'
+"""
+    capture: Dict[str, PluralRuleType] = {}
+    exec(source, {"plural_operands": plural_operands}, capture)
+    return capture[f"plural_{lang}"]
+
+
+def plural_other(value: object) -> str:
+    return "other"
+
+
+plural_rules: Dict[str, PluralRuleType] = {
+    lang: compile_plural_rule(lang, rules)
+    for lang, rules in plural_rule_sources.items()}
+
+
+_icu_argument = re.compile(r"\s*([^\s,{}:!]+)\s*,\s*(plural|select)\s*,")
+_icu_selector = re.compile(r"\s*(?:([^\s{}]+)\s*\{|(\}))")
+
+
+_formatter = string.Formatter()
+
+
+def _is_simple_field(field_name: str, spec: Optional[str]) -> bool:
+    # A plain key, and a spec that can be inlined in a double-quoted f-string
+    spec = spec or ""
+    return (bool(field_name) and not field_name.isdigit()
+            and field_name.isprintable() and spec.isprintable()
+            and not any(c in field_name for c in ".['\"\\")
+            and not any(c in spec for c in "{'\"\\"))
+
+
+def _fstring_literal(text: str) -> str:
+    # Escapes text for the body of a double-quoted f-string
+    out = []
+    for c in text:
+        if c in "{}":
+            out.append(c * 2)
+        elif c == '"':
+            out.append('\\"')
+        elif c == "\\" or not c.isprintable():
+            out.append(repr(c)[1:-1])
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+class Choice:
+    """A plural or select argument, with the parsed parts of each branch."""
+
+    __slots__ = ("name", "kind", "branches")
+
+    def __init__(self, name: str, kind: str, branches: Dict[str, PartsType]):
+        self.name = name
+        self.kind = kind
+        self.branches = branches
+
+
+PartsType = List[Union[str, Choice]]
+
+
+class MessageCompiler:
+    """Compiles a message in the format above for one locale.
+
+    A message with plural/select arguments is compiled into one function,
+    generated with exec. For each argument, it picks the branch with inlined
+    comparisons and renders it into a local; the message template is then
+    rendered with these locals as positional fields. The generated code is
+    linear in the size of the message, rendering costs little more than for
+    a flat message, and the table is never written to.
+    """
+
+    def __init__(self, lang: str):
+        self.plural_rule = plural_rules.get(lang, plural_other)
+        self.templates: List[str] = []
+        self.lines: List[str] = []
+        self.var_count = 0
+
+    def compile(self, message: str) -> RenderType:
+        parts, pos = self.parse_pattern(message, 0, None, False)
+        if pos != len(message):
+            raise ValueError(f"Single '}}' encountered in message: {message!r}")
+        if all(isinstance(part, str) for part in parts):
+            return "".join(parts).format_map  # type: ignore[arg-type]
+        self.lines = ["def render(table):"]
+        self.lines.append(f"    return {self.generate(parts, 1)}")
+        namespace = {"templates": tuple(self.templates),
+                     "plural_rule": self.plural_rule}
+        exec("\n".join(self.lines), namespace)
+        render: RenderType = namespace["render"]  # type: ignore[assignment]
+        return render
+
+    def parse_pattern(self, message: str, pos: int, pound: Optional[str],
+                      nested: bool) -> Tuple[PartsType, int]:
+        # Parses message[pos:] up to an unmatched "}" (or its end). Text is
+        # kept as str.format template text, with "#" as a field.
+        parts: PartsType = []
+        text: List[str] = []
+        while pos < len(message):
+            c = message[pos]
+            if c == "{":
+                if message.startswith("{{", pos):
+                    text.append("{{")
+                    pos += 2
+                    continue
+                m = _icu_argument.match(message, pos + 1)
+                if m is None:
+                    end = self.find_field_end(message, pos)
+                    text.append(message[pos:end])
+                    pos = end
+                    continue
+                parts.append("".join(text))
+                text = []
+                choice, pos = self.parse_choice(
+                    message, m.end(), m.group(1), m.group(2), pound)
+                parts.append(choice)
+            elif c == "}":
+                if nested or not message.startswith("}}", pos):
+                    break
+                text.append("}}")
+                pos += 2
+            elif c == "#" and pound is not None:
+                text.append(f"{{{pound}}}")
+                pos += 1
+            else:
+                text.append(c)
+                pos += 1
+        parts.append("".join(text))
+        return parts, pos
+
+    @staticmethod
+    def find_field_end(message: str, pos: int) -> int:
+        # Plain fields may nest, as in "{x:{width}}"; str.format does the rest
+        depth = 0
+        for end in range(pos, len(message)):
+            if message[end] == "{":
+                depth += 1
+            elif message[end] == "}":
+                depth -= 1
+                if depth == 0:
+                    return end + 1
+        raise ValueError(f"Expected '}}' before end of message: {message!r}")
+
+    def parse_choice(self, message: str, pos: int, name: str, kind: str,
+                     pound: Optional[str]) -> Tuple[Choice, int]:
+        if kind == "plural":
+            pound = name
+        branches: Dict[str, PartsType] = {}
+        while True:
+            m = _icu_selector.match(message, pos)
+            if m is None:
+                raise ValueError(
+                    f"Expected {kind} branch for {name!r} at {pos}: {message!r}")
+            if m.group(2):
+                pos = m.end()
+                break
+            selector = m.group(1)
+            if kind == "plural" and selector.startswith("="):
+                try:
+                    exact = float(selector[1:])
+                except ValueError:
+                    exact = math.nan
+                # Only finite numbers have a literal for the generated code
+                if not math.isfinite(exact):
+                    raise ValueError(
+                        f"Invalid plural selector {selector!r}: {message!r}")
+            branches[selector], pos = self.parse_pattern(
+                message, m.end(), pound, True)
+            if not message.startswith("}", pos):
+                raise ValueError(f"Expected '}}' before end of message: {message!r}")
+            pos += 1
+        if "other" not in branches:
+            raise ValueError(f"Missing 'other' branch for {name!r}: {message!r}")
+        return Choice(name, kind, branches), pos
+
+    def new_var(self, prefix: str) -> str:
+        self.var_count += 1
+        return f"{prefix}_{self.var_count}"
+
+    def generate(self, parts: PartsType, depth: int) -> str:
+        # Emits the code rendering each plural/select argument in parts into a
+        # local, then returns an f-string expression rendering parts as a
+        # whole, which reads those locals and plain fields from the table
+        pieces: List[str] = []
+        for part in parts:
+            if isinstance(part, str):
+                self.generate_text(part, pieces)
+            else:
+                pieces.append(f"{{{self.generate_choice(part, depth)}}}")
+        return 'f"' + "".join(pieces) + '"'
+
+    def generate_text(self, template: str, pieces: List[str]) -> None:
+        # Simple fields, as in "{name!r:>10}", are inlined as table[name];
+        # anything else (attributes, indexes, nested specs) is left to
+        # format_map, along with the rest of this template
+        fields = list(_formatter.parse(template))
+        if not all(field_name is None or _is_simple_field(field_name, spec)
+                   for _, field_name, spec, _ in fields):
+            self.templates.append(template)
+            pieces.append(f"{{templates[{len(self.templates) - 1}].format_map(table)}}")
+            return
+        for literal, field_name, spec, conversion in fields:
+            pieces.append(_fstring_literal(literal))
+            if field_name is None:
+                continue
+            pieces.append(f"{{table[{field_name!r}]")
+            if conversion:
+                pieces.append(f"!{conversion}")
+            if spec:
+                pieces.append(f":{spec}")
+            pieces.append("}")
+
+    def generate_choice(self, choice: Choice, depth: int) -> str:
+        indent = "    " * depth
+        rendered = self.new_var("part")
+        value = self.new_var("value")
+        branches = choice.branches
+        if choice.kind == "select":
+            self.lines.append(f"{indent}{value} = str(table[{choice.name!r}])")
+            self.generate_chain(
+                [(f"{value} == {selector!r}", branch)
+                 for selector, branch in branches.items() if selector != "other"],
+                branches["other"], rendered, depth)
+            return rendered
+        self.lines.append(f"{indent}{value} = table[{choice.name!r}]")
+        exact = [(f"{value} == {float(selector[1:])!r}", branch)
+                 for selector, branch in branches.items()
+                 if selector.startswith("=")]
+        categories = [(f"{{category}} == {selector!r}", branch)
+                      for selector, branch in branches.items()
+                      if selector != "other" and not selector.startswith("=")]
+        if exact:
+            self.generate_chain(exact, None, rendered, depth)
+            self.lines.append(f"{indent}else:")
+            depth += 1
+            indent += "    "
+        if categories:
+            category = self.new_var("category")
+            self.lines.append(f"{indent}{category} = plural_rule({value})")
+            categories = [(test.format(category=category), branch)
+                          for test, branch in categories]
+        self.generate_chain(categories, branches["other"], rendered, depth)
+        return rendered
+
+    def generate_chain(self, tests: List[Tuple[str, PartsType]],
+                       other: Optional[PartsType], rendered: str,
+                       depth: int) -> None:
+        indent = "    " * depth
+        for index, (test, branch) in enumerate(tests):
+            self.lines.append(f"{indent}{'elif' if index else 'if'} {test}:")
+            self.lines.append(f"{indent}    {rendered} = {self.generate(branch, depth + 1)}")
+        if other is None:
+            return
+        if tests:
+            self.lines.append(f"{indent}else:")
+            depth += 1
+            indent += "    "
+        self.lines.append(f"{indent}{rendered} = {self.generate(other, depth)}")
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_message(lang: str, message: str) -> RenderType:
+    return MessageCompiler(lang).compile(message)
+
+
+english = {
+    "{person} invites {num_guests} guests to their party":
+    "{person} invites {num_guests, plural, =0 {nobody} one {# guest} other {# guests}} to their party",
+}
 dutch = {
     "{person} invites {num_guests} guests to their party":
-    "{person} nodigt {num_guests} gasten uit op hun feest",
+    "{person} nodigt {num_guests, plural, =0 {niemand} one {# gast} other {# gasten}} uit op hun feest",
 }
-languages = {"nl": dutch}
+languages = {"en": english, "nl": dutch}
 
 # Per-context 2-letter lowercase language code
 lang_cv: ContextVar[str] = ContextVar("translation.language", default="en")
@@ -110,7 +483,7 @@ def translate(fl: FL, lang: str=None) -> str:
         table[text] = value
         return "{}"
     FL.__call__(fl, callback)
-    return translated.format(**table)
+    return compile_message(lang, translated)(table)
 
 
 person = "Guido"
@@ -124,6 +497,9 @@ num_guests = 42
 print(translate(sentence, "en"))
 print(translate(sentence, "nl"))
 print(translate(sentence, "fr"))
+for num_guests in (0, 1, 2):
+    print(translate(sentence, "en"))
+    print(translate(sentence, "nl"))
 
 
 def example_tf(ts: TS, callback: Optional[CallbackType]) -> str: